@@ -1,13 +1,68 @@
 # postgres-assistant/backend/app/api/v1/endpoints/chat.py
 
-import json
+import time
+import orjson
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import StreamingResponse
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
 from app.workflow.graph import get_graph_executor
 
 router = APIRouter()
 
+def _sse_frame(payload: dict, _dumps=orjson.dumps) -> bytes:
+    """
+    Encodes a payload as a Server-Sent Events frame. Frames are returned as
+    bytes so StreamingResponse can send them without re-encoding each chunk.
+    The encoder is bound as a default argument so the per-token call is a
+    local lookup rather than a module global plus attribute lookup.
+    """
+    return b"data: %b\n\n" % _dumps(payload)
+
+# --- Static SSE Frames ---
+# Frames whose shape never changes are encoded once at import time.
+_SSE_STREAM_END = _sse_frame({"type": "stream_end"})
+_SSE_ERROR_TEMPLATE = b'data: {"type":"error","content":%b}\n\n'
+
+# --- SSE Batching ---
+# Token frames are coalesced until the buffer reaches this size or this much
+# time has passed since the last write. Tool frames, the first token and the
+# end of the stream are always sent immediately.
+_SSE_FLUSH_BYTES = 256
+_SSE_FLUSH_INTERVAL_SECONDS = 0.01
+
+# --- Stream Handlers ---
+# The graph is streamed in "messages" mode (LLM tokens) and "updates" mode
+# (node outputs, used for tool activity). Each handler turns one streamed
+# item into SSE bytes, or returns None if it carries nothing to send.
+def _emit_token(namespace: tuple, data: tuple) -> bytes | None:
+    chunk, _metadata = data
+    # Only streamed AI chunks are tokens; whole messages written by nodes
+    # (e.g. tool results) are reported through the "updates" stream instead.
+    if isinstance(chunk, AIMessageChunk) and chunk.content:
+        return _sse_frame({'type': 'token', 'content': chunk.content})
+    return None
+
+def _emit_tool_events(namespace: tuple, data: dict) -> bytes | None:
+    # Updates from the root graph repeat the agent's final messages, so tool
+    # activity is only reported from the agent subgraph itself.
+    if not namespace:
+        return None
+    frames = []
+    for update in data.values():
+        for message in (update or {}).get("messages", []):
+            if isinstance(message, AIMessage):
+                for tool_call in message.tool_calls:
+                    frames.append(_sse_frame({'type': 'tool_start', 'tool': tool_call['name'], 'input': tool_call['args']}))
+            elif isinstance(message, ToolMessage):
+                frames.append(_sse_frame({'type': 'tool_end', 'tool': message.name, 'output': message.content}))
+    return b"".join(frames) or None
+
+# Maps stream modes to their handler.
+_STREAM_HANDLERS = {
+    "messages": _emit_token,
+    "updates": _emit_tool_events,
+}
+
 @router.post("/chat/stream")
 async def chat_stream(request: Request):
     """
@@ -19,7 +74,7 @@ async def chat_stream(request: Request):
     using Server-Sent Events (SSE).
     """
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
         user_query = body.get("query")
         thread_id = body.get("thread_id")
 
@@ -33,33 +88,44 @@ async def chat_stream(request: Request):
         messages = [HumanMessage(content=user_query)]
         super_graph = await get_graph_executor()
         async def event_stream():
+            # Bind the handler table and clock locally; they are read for
+            # every streamed item.
+            handlers = _STREAM_HANDLERS
+            monotonic = time.monotonic
+            buffer = bytearray()
+            last_flush = float("-inf")
             try:
-                async for event in super_graph.astream_events( {"messages": messages } , config):
-                    kind = event.get("event")
-
-                    if kind == "on_chat_model_stream":
-                        chunk = event["data"].get("chunk")  # Get the AIMessageChunk object
-                        if chunk:
-                            content = chunk.content         # Access its .content attribute
-                            if content:
-                                # Yield the content if it's not empty
-                                yield f"data: {json.dumps({'type': 'token', 'content': content})}\n\n"
-
-                    elif kind == "on_tool_start":
-                        yield f"data: {json.dumps({'type': 'tool_start', 'tool': event.get('name'), 'input': event['data'].get('input')})}\n\n"
-
-                    elif kind == "on_tool_end":
-                        yield f"data: {json.dumps({'type': 'tool_end', 'tool': event.get('name'), 'output': event['data'].get('output')})}\n\n"
+                async for namespace, mode, data in super_graph.astream(
+                    {"messages": messages},
+                    config,
+                    stream_mode=["messages", "updates"],
+                    subgraphs=True,
+                ):
+                    frame = handlers[mode](namespace, data)
+                    if not frame:
+                        continue
+                    buffer += frame
+                    now = monotonic()
+                    if (
+                        mode != "messages"
+                        or len(buffer) >= _SSE_FLUSH_BYTES
+                        or now - last_flush >= _SSE_FLUSH_INTERVAL_SECONDS
+                    ):
+                        yield bytes(buffer)
+                        buffer.clear()
+                        last_flush = now
 
-                yield f"data: {json.dumps({'type': 'stream_end'})}\n\n"
+                buffer += _SSE_STREAM_END
+                yield bytes(buffer)
 
             except Exception as e:
                 error_message = f"Agent execution error: {str(e)}"
-                yield f"data: {json.dumps({'type': 'error', 'content': error_message})}\n\n"
+                buffer += _SSE_ERROR_TEMPLATE % orjson.dumps(error_message)
+                yield bytes(buffer)
 
         return StreamingResponse(event_stream(), media_type="text/event-stream")
 
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON format in request body.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
\ No newline at end of file
@@ -15,6 +15,16 @@ class Settings(BaseSettings):
     # This URI is passed to the MCP server.
     POSTGRES_URI: str
 
+    # --- Conversation Memory ---
+    # SQLite file used by the LangGraph checkpointer, and how often (in
+    # seconds) its write-ahead log is checkpointed and truncated.
+    CHECKPOINT_DB_PATH: str = "checkpoints.db"
+    WAL_CHECKPOINT_INTERVAL_SECONDS: int = 300
+
+    # --- MCP Server Logging ---
+    # Passed to the SQL MCP server through the MCP config.
+    LOG_LEVEL: str = "INFO"
+
     # --- LLM Configuration ---
     LLM_PROVIDER: str = "openai"
 
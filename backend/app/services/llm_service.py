@@ -1,13 +1,11 @@
 # postgres-assistant/backend/app/services/llm_service.py
 
+from functools import lru_cache
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_anthropic import ChatAnthropic
-from langchain_groq import ChatGroq
 
 from app.core.settings import settings
 
+@lru_cache(maxsize=1)
 def get_llm() -> BaseChatModel:
     """
     Factory function to get an instance of the configured LLM provider.
@@ -24,12 +22,18 @@ def get_llm() -> BaseChatModel:
     Returns:
         An instance of a class that inherits from BaseChatModel, configured
         for streaming and ready to be used by the agent.
+
+    Note:
+        Each provider SDK is imported inside its own branch, so only the
+        selected provider's client library is loaded at runtime. The result
+        is cached, so every caller shares one client and its connection pool.
     """
     provider = settings.LLM_PROVIDER.lower()
     
     if provider == "openai":
         if not settings.OPENAI_API_KEY:
             raise ValueError("LLM_PROVIDER is 'openai', but OPENAI_API_KEY is not set.")
+        from langchain_openai import ChatOpenAI
         return ChatOpenAI(
             api_key=settings.OPENAI_API_KEY, 
             model="gpt-4o", 
@@ -40,6 +44,7 @@ def get_llm() -> BaseChatModel:
     elif provider == "gemini":
         if not settings.GEMINI_API_KEY:
             raise ValueError("LLM_PROVIDER is 'gemini', but GEMINI_API_KEY is not set.")
+        from langchain_google_genai import ChatGoogleGenerativeAI
         return ChatGoogleGenerativeAI(
             google_api_key=settings.GEMINI_API_KEY, 
             model="gemini-1.5-flash",
@@ -50,6 +55,7 @@ def get_llm() -> BaseChatModel:
     elif provider == "anthropic":
         if not settings.ANTHROPIC_API_KEY:
             raise ValueError("LLM_PROVIDER is 'anthropic', but ANTHROPIC_API_KEY is not set.")
+        from langchain_anthropic import ChatAnthropic
         return ChatAnthropic(
             api_key=settings.ANTHROPIC_API_KEY, 
             model="claude-3-5-sonnet-20240620", 
@@ -60,6 +66,7 @@ def get_llm() -> BaseChatModel:
     elif provider == "groq":
         if not settings.GROQ_API_KEY:
             raise ValueError("LLM_PROVIDER is 'groq', but GROQ_API_KEY is not set.")
+        from langchain_groq import ChatGroq
         return ChatGroq(
             api_key=settings.GROQ_API_KEY, 
             model="llama-3.1-8b-instant", 
@@ -71,6 +78,7 @@ def get_llm() -> BaseChatModel:
         # DeepSeek uses an OpenAI-compatible API structure.
         if not settings.DEEPSEEK_API_KEY:
             raise ValueError("LLM_PROVIDER is 'deepseek', but DEEPSEEK_API_KEY is not set.")
+        from langchain_openai import ChatOpenAI
         return ChatOpenAI(
             api_key=settings.DEEPSEEK_API_KEY,
             base_url="https://api.deepseek.com/v1",
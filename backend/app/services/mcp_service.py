@@ -0,0 +1,265 @@
+# postgres-assistant/backend/app/services/mcp_service.py
+
+import anyio
+import asyncio
+import hashlib
+import orjson
+from pathlib import Path
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+from app.core.settings import settings
+
+# --- MCP Configuration Template ---
+# The config file is read and parsed once at import time. Each client
+# only builds a copy of this dict with the database URI and the MCP server
+# log level injected. MCP servers started over stdio only inherit PATH from
+# this process, so settings they need are passed through the config.
+MCP_CONFIG_PATH = Path(__file__).parents[2] / "config" / "mcp_config.json"
+PG_URL_PLACEHOLDER = "${input:pg_url}"
+LOG_LEVEL_PLACEHOLDER = "${input:log_level}"
+_CONFIG_TEMPLATE = orjson.loads(MCP_CONFIG_PATH.read_bytes())
+
+# --- Tool Spec Cache ---
+# The name, description and argument schema of every MCP tool are saved here
+# after each successful connection. On the next startup the agent is built
+# from this file, and the MCP server is only started when a tool is called.
+# The cache is tagged with a fingerprint of the MCP config and the server
+# sources, and is ignored once either of them changes.
+MCP_TOOLS_CACHE_PATH = Path(__file__).parents[2] / "config" / "mcp_tools_cache.json"
+MCP_SERVERS_DIR = Path(__file__).parents[2] / "mcp-servers"
+
+# --- Shared MCP State ---
+# One MCP client is reused for the whole process. On first use one session
+# per server is opened and kept open by its own background task, so each MCP
+# server process (with its connection pool and caches) lives as long as the
+# app. The tools bound to those sessions are kept by tool name. One stop
+# event is shared by all sessions opened together, and also identifies them.
+_mcp_client = None
+_live_tools = None
+_live_tools_lock = asyncio.Lock()
+_session_tasks = []
+_session_stop = None
+
+# Errors raised when a tool call is sent over a session whose server has
+# gone away. The request never reached the server, so it is safe to retry.
+_SESSION_CLOSED_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError)
+
+def _inject_inputs(node, inputs: dict):
+    """
+    Recursively walks a parsed config object and replaces every input
+    placeholder in its string values with the matching value from `inputs`.
+    """
+    if isinstance(node, dict):
+        return {key: _inject_inputs(value, inputs) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_inject_inputs(value, inputs) for value in node]
+    if isinstance(node, str):
+        for placeholder, value in inputs.items():
+            if placeholder in node:
+                node = node.replace(placeholder, value)
+    return node
+
+def create_mcp_client() -> MultiServerMCPClient:
+    """
+    Creates a MultiServerMCPClient from the config template, with the
+    database URI and log level injected.
+    """
+    mcp_config_data = _inject_inputs(_CONFIG_TEMPLATE, {
+        PG_URL_PLACEHOLDER: settings.POSTGRES_URI,
+        LOG_LEVEL_PLACEHOLDER: settings.LOG_LEVEL,
+    })
+    print("🔧 Database URI injected into MCP configuration.")
+    return MultiServerMCPClient(mcp_config_data["mcpServers"])
+
+def get_mcp_client() -> MultiServerMCPClient:
+    """
+    Returns the shared MCP client, creating it on first use. Creation does
+    not await, so concurrent callers on the event loop cannot race here.
+    """
+    global _mcp_client
+    if _mcp_client is None:
+        _mcp_client = create_mcp_client()
+    return _mcp_client
+
+async def close_mcp():
+    """
+    Closes the MCP sessions, which stops the MCP server processes, and
+    releases the shared client and the tools loaded through it. Waits for
+    any tool loading in progress to finish first.
+    """
+    global _mcp_client, _live_tools, _session_tasks, _session_stop
+    async with _live_tools_lock:
+        if _session_stop is not None:
+            _session_stop.set()
+            for result in await asyncio.gather(*_session_tasks, return_exceptions=True):
+                if isinstance(result, Exception):
+                    print(f"⚠️ Error while closing MCP sessions: {result}")
+        _session_tasks = []
+        _session_stop = None
+        _live_tools = None
+        _mcp_client = None
+    print("🔌 MCP client released.")
+
+def _discard_sessions(stop: asyncio.Event):
+    """
+    Tells every session opened with `stop` to close and, if they are the
+    current sessions, drops their tools so the next tool call reopens them.
+    It never awaits, so it cannot interleave with _get_live_tools or
+    close_mcp, and can run while either of them holds the lock.
+    """
+    global _live_tools, _session_tasks, _session_stop
+    stop.set()
+    if _session_stop is stop:
+        _live_tools = None
+        _session_tasks = []
+        _session_stop = None
+
+async def _hold_mcp_session(mcp_client: MultiServerMCPClient, server_name: str,
+                            ready: asyncio.Future, stop: asyncio.Event):
+    """
+    Opens a session to one MCP server, passes the tools bound to it to
+    `ready`, and keeps it open until `stop` is set. The stdio transport must
+    be closed by the task that opened it, so each session is owned by its
+    own task rather than by the caller. If the session ends on its own, the
+    sessions opened with it are discarded.
+    """
+    try:
+        async with mcp_client.session(server_name) as session:
+            ready.set_result(await load_mcp_tools(session, server_name=server_name))
+            await stop.wait()
+    except Exception as e:
+        if not ready.done():
+            ready.set_exception(e)
+        else:
+            print(f"⚠️ MCP session '{server_name}' closed with an error: {e}")
+    finally:
+        if not stop.is_set():
+            _discard_sessions(stop)
+
+def _tool_spec(tool: BaseTool) -> dict:
+    """Returns the JSON-serializable spec of a tool."""
+    args_schema = tool.args_schema
+    if not isinstance(args_schema, dict):
+        args_schema = args_schema.model_json_schema()
+    return {"name": tool.name, "description": tool.description, "args_schema": args_schema}
+
+def _tool_cache_fingerprint() -> str:
+    """
+    Returns a hash of the MCP config template and of every MCP server
+    source file, so cached tool specs can be matched to the code they
+    were loaded from.
+    """
+    digest = hashlib.blake2b(orjson.dumps(_CONFIG_TEMPLATE, option=orjson.OPT_SORT_KEYS))
+    for path in sorted(MCP_SERVERS_DIR.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def _write_tool_cache(tools: list[BaseTool]):
+    """Saves the specs of the given tools to the tool cache file."""
+    try:
+        cache = {
+            "fingerprint": _tool_cache_fingerprint(),
+            "tools": [_tool_spec(tool) for tool in tools],
+        }
+        MCP_TOOLS_CACHE_PATH.write_bytes(orjson.dumps(cache, option=orjson.OPT_INDENT_2))
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️ Could not write MCP tool cache: {e}")
+
+def _read_tool_cache() -> list[dict] | None:
+    """
+    Returns the cached tool specs, or None if there is no usable cache or
+    it was written for a different MCP config or server version.
+    """
+    try:
+        cache = orjson.loads(MCP_TOOLS_CACHE_PATH.read_bytes())
+        fingerprint = _tool_cache_fingerprint()
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or cache.get("fingerprint") != fingerprint:
+        print("♻️ MCP tool cache is out of date; loading tools from the MCP servers.")
+        return None
+    return cache.get("tools")
+
+async def _get_live_tools() -> dict[str, BaseTool]:
+    """
+    Opens the MCP sessions on first use, or after they were discarded, and
+    returns their tools by name. All servers are connected concurrently, so
+    startup cost grows with the slowest server rather than with the number
+    of servers. The tool cache is refreshed every time the tools are loaded;
+    cache file I/O and JSON encoding run in a worker thread to keep the
+    event loop free.
+    """
+    global _live_tools, _session_tasks, _session_stop
+    live_tools = _live_tools
+    if live_tools is None:
+        async with _live_tools_lock:
+            live_tools = _live_tools
+            if live_tools is None:
+                loop = asyncio.get_running_loop()
+                mcp_client = get_mcp_client()
+                stop = asyncio.Event()
+                readies = {name: loop.create_future() for name in _CONFIG_TEMPLATE["mcpServers"]}
+                _session_stop = stop
+                _session_tasks = [
+                    asyncio.create_task(_hold_mcp_session(mcp_client, name, ready, stop))
+                    for name, ready in readies.items()
+                ]
+                try:
+                    server_tools = await asyncio.gather(*readies.values())
+                    if stop.is_set():
+                        raise ConnectionError("An MCP session closed while the others were opening.")
+                except Exception:
+                    _discard_sessions(stop)
+                    raise
+                tools = [tool for tools in server_tools for tool in tools]
+                live_tools = _live_tools = {tool.name: tool for tool in tools}
+                print(f"🔗 MCP sessions opened with {len(tools)} tools.")
+                await asyncio.to_thread(_write_tool_cache, tools)
+    return live_tools
+
+def _make_lazy_tool(spec: dict) -> StructuredTool:
+    """
+    Builds a tool from a cached spec. The MCP servers are only contacted
+    when the tool is first called.
+    """
+    name = spec["name"]
+
+    async def call_tool(**kwargs):
+        for attempt in range(2):
+            live_tools = await _get_live_tools()
+            live_tool = live_tools.get(name)
+            if live_tool is None:
+                raise ToolException(f"Tool '{name}' is no longer provided by the MCP server.")
+            try:
+                return await live_tool.ainvoke(kwargs)
+            except _SESSION_CLOSED_ERRORS:
+                # The server went away; reopen the sessions and retry once.
+                if attempt:
+                    raise
+                print(f"♻️ MCP session for '{name}' was closed; reconnecting.")
+                if _live_tools is live_tools:
+                    _discard_sessions(_session_stop)
+
+    return StructuredTool(
+        name=name,
+        description=spec["description"],
+        args_schema=spec["args_schema"],
+        coroutine=call_tool,
+    )
+
+async def get_mcp_tools() -> list[BaseTool]:
+    """
+    Returns the tools exposed by the configured MCP servers.
+
+    If a tool spec cache exists, lazy tools are built from it without
+    contacting the MCP servers. Otherwise the servers are started, their
+    tools are loaded, and the cache is written for the next startup.
+    """
+    specs = await asyncio.to_thread(_read_tool_cache)
+    if specs:
+        print(f"🛠️  Using cached MCP tool specs from: {MCP_TOOLS_CACHE_PATH}")
+        return [_make_lazy_tool(spec) for spec in specs]
+    return list((await _get_live_tools()).values())
@@ -1,23 +1,86 @@
+import asyncio
+import contextlib
+import aiosqlite
 from app.workflow.state import State
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph , END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from app.agents.postgres_assistant_agent import get_agent_executor
+from app.core.settings import settings
 
 super_graph = None
+_graph_lock = asyncio.Lock()
+
+# SQLite connection backing the checkpointer and the task that periodically
+# checkpoints its write-ahead log.
+_checkpoint_conn = None
+_wal_checkpoint_task = None
+
+async def _wal_checkpoint_loop(saver: AsyncSqliteSaver, interval: float):
+    """
+    Periodically folds the write-ahead log back into the database file and
+    truncates it, so the WAL does not grow without bound under constant writes.
+    The saver's lock is held so the checkpoint never lands in the middle of a
+    checkpoint write on the shared connection.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with saver.lock, saver.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cursor:
+                busy, log_frames, checkpointed = await cursor.fetchone()
+            print(f"📝 WAL checkpoint: busy={busy}, log={log_frames}, checkpointed={checkpointed}")
+        except Exception as e:
+            print(f"⚠️ WAL checkpoint failed: {e}")
+
+async def create_checkpointer() -> AsyncSqliteSaver:
+    """
+    Opens the SQLite checkpoint database in WAL mode and starts the
+    background WAL checkpoint task.
+    """
+    global _checkpoint_conn, _wal_checkpoint_task
+    _checkpoint_conn = await aiosqlite.connect(settings.CHECKPOINT_DB_PATH)
+    await _checkpoint_conn.execute("PRAGMA journal_mode=WAL")
+    await _checkpoint_conn.execute("PRAGMA synchronous=NORMAL")
+    saver = AsyncSqliteSaver(_checkpoint_conn)
+    _wal_checkpoint_task = asyncio.create_task(
+        _wal_checkpoint_loop(saver, settings.WAL_CHECKPOINT_INTERVAL_SECONDS)
+    )
+    return saver
+
+async def close_checkpointer():
+    """
+    Stops the WAL checkpoint task, waiting for any checkpoint in progress to
+    unwind, and then closes the checkpoint database.
+    """
+    global _checkpoint_conn, _wal_checkpoint_task
+    if _wal_checkpoint_task is not None:
+        _wal_checkpoint_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _wal_checkpoint_task
+        _wal_checkpoint_task = None
+    if _checkpoint_conn is not None:
+        await _checkpoint_conn.close()
+        _checkpoint_conn = None
 
 async def build_graph():
     workflow = StateGraph(State)
-    # Set up the checkpointer for persistent memory.
-    memory = MemorySaver()
-    print("📝 Short-term memory (checkpointer) enabled using In-Memory Saver.")
+    # The agent is built first, so a failed build does not leave an open
+    # checkpoint database behind.
     postgres_agent = await get_agent_executor()
+    # Set up the checkpointer for persistent memory.
+    memory = await create_checkpointer()
+    print(f"📝 Short-term memory (checkpointer) enabled using SQLite at '{settings.CHECKPOINT_DB_PATH}'.")
 
-    def postgres_node(state: State):
+    async def postgres_node(state: State, config: RunnableConfig):
         """
         This node invokes the ReAct agent with the current state and returns
-        the agent's final response to update the state.
+        the agent's final response to update the state. MCP tools can only
+        be called asynchronously, so the agent is awaited. The config is
+        passed on explicitly because Python 3.10 does not propagate the
+        callback context into async nodes, which would hide the agent's
+        tokens and tool events from the stream.
         """
-        result = postgres_agent.invoke(state)
+        result = await postgres_agent.ainvoke(state, config)
         return {"messages": result["messages"]}
 
     workflow.add_node("postgres-agent", postgres_node)
@@ -33,7 +96,9 @@ async def get_graph_executor():
     """
     global super_graph
     if super_graph is None:
-        super_graph = await build_graph()
+        async with _graph_lock:
+            if super_graph is None:
+                super_graph = await build_graph()
     return super_graph
     
 
@@ -1,7 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.endpoints import chat
-from app.workflow.graph import get_graph_executor
+from app.workflow.graph import get_graph_executor, close_checkpointer
+from app.services.mcp_service import close_mcp
 
 # Create the main FastAPI application instance
 app = FastAPI(
@@ -35,11 +36,25 @@ async def startup_event():
     This function is executed when the FastAPI application starts.
     It's the perfect place to initialize our agent, ensuring it's
     ready to handle requests without any delay on the first call.
+    Building the graph also creates the agent, so both the MCP server
+    connections and the graph compilation are paid for here.
     """
     print("--- Application Startup ---")
     await get_graph_executor()
     print("--- Application is now ready to accept requests ---")
 
+# --- Shutdown Event Handler ---
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    This function is executed when the FastAPI application stops.
+    It releases the MCP client and closes the conversation memory
+    database cleanly.
+    """
+    print("--- Application Shutdown ---")
+    await close_mcp()
+    await close_checkpointer()
+
 
 # --- API Router Inclusion ---
 # This includes all the routes defined in the chat.py module.
@@ -1,102 +1,442 @@
 import sys
 import os
+import logging
 import asyncio
-import json
-from typing import List, Dict, Any, Optional
-
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import hashlib
+import anyio
+import orjson
+import re
+import ssl
+import time
+from functools import partial
+from typing import List, Dict, Any, NamedTuple, Optional, Sequence
 
+from sqlparse import formatter as sqlparse_formatter
+from sqlparse import tokens as sqlparse_tokens
+from sqlparse.engine import FilterStack
 from fastmcp import FastMCP
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from langchain_community.utilities import SQLDatabase
-from langchain_core.tools import BaseTool
-from app.services.llm_service import get_llm
+from fastmcp.tools import Tool
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import DataError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 # Initialize the FastMCP Server
 mcp = FastMCP("LangChain SQL Toolkit Server")
 
+# stdout carries the MCP stdio protocol, so all diagnostics go through this
+# logger, which main() sends to stderr.
+logger = logging.getLogger("sql_mcp")
+
+class TTLCache:
+    """
+    Small dict-based cache whose entries expire after `ttl` seconds. When
+    full, the oldest entry is evicted to make room for a new one.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Any, tuple] = {}
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        return value
+
+    def set(self, key, value):
+        self._data.pop(key, None)
+        if len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        self._data.clear()
+
+# Lists every table in the current schema with its column count and the
+# planner's row estimate (reltuples is -1 for tables never analyzed).
+_SCHEMA_SUMMARY_QUERY = """
+SELECT c.relname, count(a.attnum), c.reltuples::bigint
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+WHERE c.relkind IN ('r', 'p') AND n.nspname = current_schema()
+GROUP BY c.relname, c.reltuples
+ORDER BY c.relname
+"""
+
+# Describes the columns of one table in the current schema, including the
+# key constraints each column takes part in, in a single round-trip.
+_TABLE_COLUMNS_QUERY = """
+SELECT c.column_name, c.data_type, c.is_nullable, c.column_default,
+       (SELECT string_agg(DISTINCT tc.constraint_type, ', ')
+        FROM information_schema.key_column_usage k
+        JOIN information_schema.table_constraints tc
+          ON tc.constraint_schema = k.constraint_schema AND tc.constraint_name = k.constraint_name
+        WHERE k.table_schema = c.table_schema AND k.table_name = c.table_name
+          AND k.column_name = c.column_name)
+FROM information_schema.columns c
+WHERE c.table_schema = current_schema() AND c.table_name = :table_name
+ORDER BY c.ordinal_position
+"""
+
+# libpq connection parameters that psycopg2 accepted in the URI query string
+# but asyncpg rejects as keywords. They are removed from the URL and either
+# translated into asyncpg connect arguments or dropped with a warning.
+_LIBPQ_SSL_PARAMS = ("sslmode", "sslrootcert", "sslcert", "sslkey")
+_LIBPQ_IGNORED_PARAMS = (
+    "sslcrl", "sslcompression", "sslpassword", "gssencmode", "channel_binding",
+    "options", "keepalives", "keepalives_idle", "keepalives_interval", "keepalives_count",
+)
+
+def _ssl_connect_arg(params: Dict[str, str]) -> Any:
+    """
+    Translate libpq SSL parameters into asyncpg's `ssl` argument: the
+    sslmode string on its own, or an SSLContext when certificate files are
+    given. As in libpq, a root certificate turns `require` into `verify-ca`.
+    """
+    sslmode = params.get("sslmode", "prefer")
+    if sslmode == "disable" or not any(params.get(name) for name in _LIBPQ_SSL_PARAMS[1:]):
+        return sslmode
+    context = ssl.create_default_context(cafile=params.get("sslrootcert"))
+    context.check_hostname = sslmode == "verify-full"
+    if not params.get("sslrootcert") and sslmode not in ("verify-ca", "verify-full"):
+        context.verify_mode = ssl.CERT_NONE
+    if params.get("sslcert"):
+        context.load_cert_chain(params["sslcert"], params.get("sslkey"))
+    return context
+
+def _split_libpq_params(url: URL) -> tuple:
+    """
+    Remove libpq-only parameters from the URL query string and return the
+    cleaned URL with the equivalent asyncpg connect arguments.
+    """
+    query = dict(url.query)
+    connect_args: Dict[str, Any] = {}
+    ssl_params = {name: query.pop(name) for name in _LIBPQ_SSL_PARAMS if name in query}
+    if ssl_params:
+        connect_args["ssl"] = _ssl_connect_arg(ssl_params)
+    if "connect_timeout" in query:
+        connect_args["timeout"] = float(query.pop("connect_timeout"))
+    if "application_name" in query:
+        connect_args["server_settings"] = {"application_name": query.pop("application_name")}
+    for name in _LIBPQ_IGNORED_PARAMS:
+        if name in query:
+            query.pop(name)
+            logger.warning("Ignoring connection parameter '%s', which asyncpg does not support", name)
+    return url.set(query=query), connect_args
+
+class AsyncSQLDatabase:
+    """
+    Minimal async counterpart of LangChain's SQLDatabase, backed by an
+    SQLAlchemy asyncio engine. Every query is awaited on the event loop
+    instead of being dispatched to a worker thread.
+    """
+
+    def __init__(self, engine: AsyncEngine, sample_rows_in_table_info: int = 3):
+        self._engine = engine
+        self._sample_rows_in_table_info = sample_rows_in_table_info
+        # Schema reflection results; schemas change far less often than
+        # agents inspect them.
+        self._schema_cache = TTLCache(maxsize=128, ttl=60)
+        # EXPLAIN verdicts keyed by a hash of the normalized query, so
+        # repeated validations skip the planner.
+        self._explain_cache = TTLCache(maxsize=1024, ttl=300)
+
+    @classmethod
+    def from_uri(cls, db_uri: str, **engine_args) -> "AsyncSQLDatabase":
+        """
+        Create an instance from a (sync or async) PostgreSQL URI. libpq
+        query parameters such as `sslmode` are translated for asyncpg.
+        """
+        url, connect_args = _split_libpq_params(make_url(db_uri).set(drivername="postgresql+asyncpg"))
+        if connect_args:
+            engine_args = {**engine_args, "connect_args": {**engine_args.get("connect_args", {}), **connect_args}}
+        return cls(create_async_engine(url, **engine_args))
+
+    @property
+    def dialect(self) -> str:
+        return self._engine.dialect.name
+
+    async def run(self, query: str) -> List[tuple]:
+        """Execute a query in its own transaction and return the fetched rows."""
+        async with self._engine.begin() as conn:
+            result = await conn.execute(text(query))
+            if not result.returns_rows:
+                return []
+            return [tuple(row) for row in result.fetchall()]
+
+    async def run_many(self, statements: Sequence[str]) -> List[tuple]:
+        """
+        Execute several statements in order in one transaction and return the
+        rows of the last one. asyncpg prepares every statement it runs, and a
+        prepared statement may only contain a single command.
+        """
+        async with self._engine.begin() as conn:
+            for statement in statements:
+                result = await conn.execute(text(statement))
+            if not result.returns_rows:
+                return []
+            return [tuple(row) for row in result.fetchall()]
+
+    async def run_preview(self, query: str, max_rows: int) -> tuple:
+        """
+        Execute a row-returning query through a server-side cursor and fetch
+        at most `max_rows + 1` rows, so memory stays bounded no matter how
+        large the full result is. Returns the rows (up to `max_rows`) and
+        whether more rows were available.
+        """
+        async with self._engine.begin() as conn:
+            result = await conn.stream(text(query))
+            rows = [tuple(row) for row in await result.fetchmany(max_rows + 1)]
+            await result.close()
+        return rows[:max_rows], len(rows) > max_rows
+
+    async def check_connection(self) -> str:
+        """
+        Check out a pooled connection and return the pool status. With
+        pool_pre_ping the checkout itself validates the connection, so no
+        extra query is needed.
+        """
+        async with self._engine.connect():
+            pass
+        return self._engine.pool.status()
+
+    def invalidate_schema_cache(self):
+        """Drop all cached schema results, e.g. after running DDL."""
+        self._schema_cache.clear()
+        # Query validity depends on the schema too.
+        self._explain_cache.clear()
+
+    async def explain(self, normalized: str) -> Optional[str]:
+        """
+        Run EXPLAIN on a query without executing it. Returns None if the query
+        plans successfully, or the error message otherwise. The query is
+        expected in the form produced by _parse_query (comments, keyword case
+        and whitespace normalized; literals kept, since they affect validity),
+        and verdicts are cached by a hash of it. Only rejections by the
+        planner are cached; connection and timeout errors are raised.
+        """
+        key = hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+        verdict = self._explain_cache.get(key, default=False)
+        if verdict is False:
+            try:
+                await self.run(f"EXPLAIN {normalized}")
+                verdict = None
+            except (ProgrammingError, DataError) as e:
+                verdict = str(e)
+            self._explain_cache.set(key, verdict)
+        return verdict
+
+    async def get_usable_table_names(self) -> List[str]:
+        """Return the sorted names of all tables in the default schema."""
+        key = ("table_names",)
+        tables = self._schema_cache.get(key)
+        if tables is None:
+            async with self._engine.connect() as conn:
+                tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+            tables = sorted(tables)
+            self._schema_cache.set(key, tables)
+        return tables
+
+    async def get_schema_summary(self) -> List[Dict[str, Any]]:
+        """
+        Return one compact entry per table (name, column count and the
+        planner's row estimate), fetched with a single catalog query.
+        """
+        key = ("schema_summary",)
+        summary = self._schema_cache.get(key)
+        if summary is None:
+            summary = [
+                {"table": table, "columns": columns, "approx_rows": approx_rows if approx_rows >= 0 else None}
+                for table, columns, approx_rows in await self.run(_SCHEMA_SUMMARY_QUERY)
+            ]
+            self._schema_cache.set(key, summary)
+        return summary
+
+    async def get_table_info(self, table_names: Optional[List[str]] = None) -> str:
+        """
+        Return a CREATE TABLE-style description and a few sample rows for each
+        of the given tables (or all tables). Tables are fetched concurrently,
+        each on its own pooled connection, and cached individually.
+        """
+        if table_names is None:
+            table_names = await self.get_usable_table_names()
+        infos = await asyncio.gather(*(self._get_one_table_info(name) for name in table_names))
+        return "\n\n".join(infos)
+
+    async def _get_one_table_info(self, table_name: str) -> str:
+        key = ("table_info", table_name)
+        info = self._schema_cache.get(key)
+        if info is None:
+            async with self._engine.connect() as conn:
+                columns = (await conn.execute(text(_TABLE_COLUMNS_QUERY), {"table_name": table_name})).fetchall()
+                if not columns:
+                    raise ValueError(f"Table '{table_name}' not found in database")
+                quoted_name = self._engine.dialect.identifier_preparer.quote(table_name)
+                sample_query = f"SELECT * FROM {quoted_name} LIMIT {self._sample_rows_in_table_info}"
+                rows = (await conn.execute(text(sample_query))).fetchall()
+            info = self._format_table_info(table_name, columns, rows)
+            self._schema_cache.set(key, info)
+        return info
+
+    def _format_table_info(self, table_name: str, columns: list, rows: list) -> str:
+        column_defs = []
+        for name, data_type, is_nullable, default, constraints in columns:
+            column_def = f"\t{name} {data_type}"
+            if is_nullable == "NO":
+                column_def += " NOT NULL"
+            if default is not None:
+                column_def += f" DEFAULT {default}"
+            if constraints:
+                column_def += f" /* {constraints} */"
+            column_defs.append(column_def)
+        columns_str = "\t".join(column[0] for column in columns)
+        rows_str = _format_rows(rows, max_width=100)
+        return (
+            f"CREATE TABLE {table_name} (\n" + ",\n".join(column_defs) + "\n)\n\n"
+            f"/*\n{self._sample_rows_in_table_info} rows from {table_name} table:\n"
+            f"{columns_str}\n{rows_str}\n*/"
+        )
+
+# Connection pool settings: enough connections for concurrent tool calls,
+# stale connections detected on checkout and recycled before idle timeouts.
+# Larger per-connection statement caches let repeated queries (EXPLAIN
+# checks, schema lookups) reuse server-side prepared statements instead of
+# being parsed and planned again.
+_ENGINE_ARGS = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_timeout": 30,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+    "connect_args": {
+        # SQLAlchemy's asyncpg adapter cache of prepared statements
+        "prepared_statement_cache_size": 1024,
+        # asyncpg's own statement cache
+        "statement_cache_size": 1024,
+    },
+}
+
 # Global variables to store database connection
 _database = None
-_toolkit = None
+# Fields of the sql_db_info report that never change after initialization.
+_static_info: Dict[str, Any] = {}
 
 def initialize_database(db_uri: str):
-    """Initialize the database connection and toolkit."""
-    global _database, _toolkit
+    """Initialize the database connection."""
+    global _database, _static_info
     
-    print(f"MCP Server: Initializing database connection from URI...", flush=True)
-    _database = SQLDatabase.from_uri(db_uri)
-    
-    print("MCP Server: Initializing LLM for toolkit...", flush=True)
-    llm = get_llm()
-    
-    _toolkit = SQLDatabaseToolkit(db=_database, llm=llm)
-    print("MCP Server: Database and toolkit initialized successfully", flush=True)
+    logger.info("Initializing database connection from URI...")
+    _database = AsyncSQLDatabase.from_uri(db_uri, **_ENGINE_ARGS)
+    _static_info = {"dialect": _database.dialect, "connection_status": "Connected"}
+    logger.info("Database initialized successfully")
+
+# Maximum number of rows returned by sql_db_query.
+_PREVIEW_ROWS = 100
+
+# Backslashes, tabs and line breaks inside values are escaped so that every
+# row stays on one line and every column stays in its own tab-separated field.
+_CELL_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def _format_rows(rows, max_width: Optional[int] = None) -> str:
+    """
+    Render rows as tab-separated lines, one per row. NULLs are shown as
+    NULL so they cannot be mistaken for the string 'None'. Values are cut
+    to `max_width` characters when it is given.
+    """
+    return "\n".join([
+        "\t".join(["NULL" if value is None else str(value).translate(_CELL_ESCAPES)[:max_width] for value in row])
+        for row in rows
+    ])
 
-@mcp.tool(name="sql_db_query", description="Execute a SQL query against the database and return results. Use this to run SELECT, INSERT, UPDATE, or other SQL commands.")
 async def sql_db_query(query: str) -> str:
     """Execute a SQL query against the database"""
     try:
         if _database is None:
             return "Error: Database not initialized"
         
-        print(f"MCP Server: Executing query: {query[:100]}...", flush=True)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Executing query: %s...", query[:100])
         
-        # Use the database directly for better control
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, lambda: _database.run(query))
+        # SELECTs are streamed so only the preview rows are ever fetched;
+        # other statements, including SELECT ... INTO, run normally.
+        # Scripts of several statements are run one statement at a time.
+        has_more = False
+        parsed = _parse_query(query)
+        if len(parsed.statements) > 1:
+            result = await _database.run_many(parsed.statements)
+        elif parsed.returns_rows:
+            result, has_more = await _database.run_preview(query, _PREVIEW_ROWS)
+        else:
+            result = await _database.run(query)
         
         # Format the result nicely
-        if isinstance(result, list):
-            if len(result) == 0:
-                return "Query executed successfully. No rows returned."
-            elif len(result) > 100:
-                return f"Query returned {len(result)} rows. First 100 rows:\n{str(result[:100])}"
-            else:
-                return f"Query returned {len(result)} rows:\n{str(result)}"
+        if len(result) == 0:
+            return "Query executed successfully. No rows returned."
+        if has_more:
+            return f"Query returned more than {_PREVIEW_ROWS} rows. First {_PREVIEW_ROWS} rows:\n{_format_rows(result)}"
+        elif len(result) > _PREVIEW_ROWS:
+            return f"Query returned {len(result)} rows. First {_PREVIEW_ROWS} rows:\n{_format_rows(result[:_PREVIEW_ROWS])}"
         else:
-            return str(result)
+            return f"Query returned {len(result)} rows:\n{_format_rows(result)}"
             
     except Exception as e:
         error_msg = f"Error executing SQL query: {str(e)}"
-        print(f"MCP Server: {error_msg}", flush=True)
+        logger.error(error_msg)
+        return error_msg
+
+async def sql_db_schema_summary() -> str:
+    """Get a compact summary of all database tables"""
+    try:
+        if _database is None:
+            return "Error: Database not initialized"
+        
+        logger.debug("Getting schema summary")
+        
+        summary = await _database.get_schema_summary()
+        return orjson.dumps(summary).decode()
+        
+    except Exception as e:
+        error_msg = f"Error getting schema summary: {str(e)}"
+        logger.error(error_msg)
         return error_msg
 
-@mcp.tool(name="sql_db_schema", description="Get the schema and table information for the database. Optionally specify table names separated by commas.")
-async def sql_db_schema(table_names: Optional[str] = None) -> str:
+async def sql_db_schema(table_names: str) -> str:
     """Get schema information for database tables"""
     try:
         if _database is None:
             return "Error: Database not initialized"
         
-        print(f"MCP Server: Getting schema for tables: {table_names or 'all'}", flush=True)
+        if not table_names or not table_names.strip():
+            return "Error: table_names is required. Use sql_db_schema_summary to see all tables first."
         
-        loop = asyncio.get_event_loop()
-        if table_names and table_names.strip():
-            # Get schema for specific tables
-            table_list = [t.strip() for t in table_names.split(',')]
-            result = await loop.run_in_executor(None, lambda: _database.get_table_info(table_list))
-        else:
-            # Get schema for all tables
-            result = await loop.run_in_executor(None, lambda: _database.get_table_info())
+        logger.debug("Getting schema for tables: %s", table_names)
+        
+        table_list = [t.strip() for t in table_names.split(',')]
+        result = await _database.get_table_info(table_list)
         
         return str(result)
         
     except Exception as e:
         error_msg = f"Error getting schema: {str(e)}"
-        print(f"MCP Server: {error_msg}", flush=True)
+        logger.error(error_msg)
         return error_msg
 
-@mcp.tool(name="sql_db_list_tables", description="List all available tables in the database")
 async def sql_db_list_tables() -> str:
     """List all tables in the database"""
     try:
         if _database is None:
             return "Error: Database not initialized"
         
-        print("MCP Server: Listing all tables", flush=True)
+        logger.debug("Listing all tables")
         
-        loop = asyncio.get_event_loop()
-        tables = await loop.run_in_executor(None, lambda: _database.get_usable_table_names())
+        tables = await _database.get_usable_table_names()
         
         if isinstance(tables, list):
             return f"Available tables ({len(tables)}): {', '.join(tables)}"
@@ -105,152 +445,295 @@ async def sql_db_list_tables() -> str:
             
     except Exception as e:
         error_msg = f"Error listing tables: {str(e)}"
-        print(f"MCP Server: {error_msg}", flush=True)
+        logger.error(error_msg)
         return error_msg
 
-@mcp.tool(name="sql_db_query_checker", description="Check if a SQL query is safe and valid before execution")
+# Dangerous statements, matched as whole words in a single pass so that
+# identifiers such as `droplets` or `deleted_at` are not flagged.
+_DANGEROUS_KEYWORDS_RE = re.compile(
+    r"\b(?:DROP\s+DATABASE|CREATE\s+DATABASE|ALTER\s+TABLE|DROP|DELETE|TRUNCATE)\b",
+    re.IGNORECASE,
+)
+
+# Cheap prefilter for the regex: the query is upper-cased as bytes with a
+# translation table and scanned for the keyword stems with C-level `in`
+# checks. Only queries containing a stem are passed to the regex, which then
+# confirms whole-word matches.
+_ASCII_UPPER = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_DANGEROUS_STEMS = (b"DROP", b"DELETE", b"TRUNCATE", b"ALTER", b"DATABASE")
+
+def _find_dangerous_keyword(query: str) -> Optional[str]:
+    """Return the first dangerous keyword in the query, normalized, or None."""
+    folded = query.encode("utf-8", "ignore").translate(_ASCII_UPPER)
+    if not any(stem in folded for stem in _DANGEROUS_STEMS):
+        return None
+    match = _DANGEROUS_KEYWORDS_RE.search(query)
+    if match is None:
+        return None
+    return " ".join(match.group(0).upper().split())
+
+class ParsedQuery(NamedTuple):
+    """The parts of a query that the checker and executor tools look at."""
+    statement_type: Optional[str]
+    # False for SELECT ... INTO, which creates a table instead of returning rows
+    returns_rows: bool
+    dangerous_keyword: Optional[str]
+    normalized: str
+    # Each non-empty statement, normalized and without its trailing semicolon
+    statements: tuple
+
+# Parsed queries, keyed by a hash of the raw query text, so that a query sent
+# to sql_db_query_checker and then to sql_db_query is only parsed once.
+_parsed_queries = TTLCache(maxsize=256, ttl=300)
+_NORMALIZE_OPTIONS = sqlparse_formatter.validate_options(
+    {"keyword_case": "upper", "strip_comments": True, "strip_whitespace": True}
+)
+
+def _selects_into(statement) -> bool:
+    """Whether a statement has a top-level INTO keyword (SELECT ... INTO)."""
+    return any(
+        token.ttype in sqlparse_tokens.Keyword and token.normalized == "INTO"
+        for token in statement.tokens
+    )
+
+def _parse_query(query: str) -> ParsedQuery:
+    """
+    Parse and normalize a query in a single sqlparse pass. The statement type
+    comes from the first statement, so queries starting with a CTE
+    (`WITH ... SELECT`) are recognized as SELECTs.
+    """
+    key = hashlib.blake2b(query.encode(), digest_size=16).digest()
+    parsed = _parsed_queries.get(key)
+    if parsed is None:
+        stack = sqlparse_formatter.build_filter_stack(FilterStack(), _NORMALIZE_OPTIONS)
+        statements = list(stack.run(query))
+        statement_type = statements[0].get_type() if statements else None
+        parsed = ParsedQuery(
+            statement_type=statement_type,
+            returns_rows=statement_type == "SELECT" and not _selects_into(statements[0]),
+            dangerous_keyword=_find_dangerous_keyword(query),
+            normalized="".join(str(statement) for statement in statements),
+            statements=tuple(filter(None, (str(statement).strip().rstrip(";").strip() for statement in statements))),
+        )
+        _parsed_queries.set(key, parsed)
+    return parsed
+
 async def sql_db_query_checker(query: str) -> str:
     """Validate a SQL query for safety and syntax"""
     try:
         if _database is None:
             return "Error: Database not initialized"
         
-        print(f"MCP Server: Checking query safety: {query[:50]}...", flush=True)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Checking query safety: %s...", query[:50])
         
-        # Basic safety checks
-        query_upper = query.strip().upper()
+        parsed = _parse_query(query)
         
         # Check for dangerous operations
-        dangerous_keywords = ['DROP', 'DELETE', 'TRUNCATE', 'ALTER TABLE', 'CREATE DATABASE', 'DROP DATABASE']
-        for keyword in dangerous_keywords:
-            if keyword in query_upper:
-                return f"WARNING: Query contains potentially dangerous keyword '{keyword}'. Please review carefully."
+        if parsed.dangerous_keyword:
+            return f"WARNING: Query contains potentially dangerous keyword '{parsed.dangerous_keyword}'. Please review carefully."
         
         # Check for basic syntax issues
-        if not query.strip():
+        if not parsed.normalized:
             return "ERROR: Empty query provided"
         
-        if not query.strip().endswith(';') and query_upper.startswith('SELECT'):
-            query += ';'
-        
         # Try to validate with a dry run (using EXPLAIN for SELECT queries)
-        if query_upper.startswith('SELECT'):
-            try:
-                loop = asyncio.get_event_loop()
-                explain_query = f"EXPLAIN {query}"
-                await loop.run_in_executor(None, lambda: _database.run(explain_query))
+        if parsed.statement_type == "SELECT":
+            syntax_error = await _database.explain(parsed.normalized)
+            if syntax_error is None:
                 return "Query syntax appears valid and safe for execution"
-            except Exception as syntax_error:
-                return f"Query syntax error: {str(syntax_error)}"
+            return f"Query syntax error: {syntax_error}"
         
         return "Query passed basic safety checks. Please review before execution."
         
     except Exception as e:
         error_msg = f"Error checking query: {str(e)}"
-        print(f"MCP Server: {error_msg}", flush=True)
+        logger.error(error_msg)
         return error_msg
 
-@mcp.tool(name="sql_db_info", description="Get general information about the database connection and capabilities")
 async def sql_db_info() -> str:
     """Get information about the database"""
     try:
         if _database is None:
             return "Error: Database not initialized"
         
-        print("MCP Server: Getting database info", flush=True)
-        
-        loop = asyncio.get_event_loop()
+        logger.debug("Getting database info")
         
         # Get basic database info
-        tables = await loop.run_in_executor(None, lambda: _database.get_usable_table_names())
-        dialect = str(_database.dialect)
+        tables = await _database.get_usable_table_names()
         
         info = {
-            "dialect": dialect,
-            "total_tables": len(tables) if isinstance(tables, list) else "Unknown",
-            "table_names": tables[:10] if isinstance(tables, list) and len(tables) > 10 else tables,
-            "connection_status": "Connected"
+            **_static_info,
+            "total_tables": len(tables),
+            "table_names": tables[:10],
         }
         
-        return json.dumps(info, indent=2)
+        return orjson.dumps(info, option=orjson.OPT_INDENT_2).decode()
         
     except Exception as e:
         error_msg = f"Error getting database info: {str(e)}"
-        print(f"MCP Server: {error_msg}", flush=True)
+        logger.error(error_msg)
         return error_msg
 
-@mcp.tool(name="health_check", description="Check if the MCP server and database connection are working correctly")
+# Last healthy health_check report and when it was produced. Healthy reports
+# are reused for a short time so burst polling doesn't hit the database;
+# failures are never cached.
+_HEALTH_CACHE_SECONDS = 2.0
+_last_health: Optional[tuple] = None
+
 async def health_check() -> str:
     """Check server and database health status"""
+    global _last_health
     try:
+        if _last_health is not None and time.monotonic() - _last_health[0] < _HEALTH_CACHE_SECONDS:
+            return _last_health[1]
+        
         status = {
             "server_status": "running",
-            "database_initialized": _database is not None,
-            "toolkit_initialized": _toolkit is not None
+            "database_initialized": _database is not None
         }
         
         if _database is not None:
             try:
-                # Test database connection with a simple query
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, lambda: _database.run("SELECT 1"))
+                # A pool checkout is pre-pinged, so it doubles as the connection test
+                status["pool_status"] = await _database.check_connection()
                 status["database_connection"] = "active"
             except Exception as db_error:
                 status["database_connection"] = f"error: {str(db_error)}"
         else:
             status["database_connection"] = "not_initialized"
         
-        return json.dumps(status, indent=2)
+        report = orjson.dumps(status, option=orjson.OPT_INDENT_2).decode()
+        if status["database_connection"] == "active":
+            _last_health = (time.monotonic(), report)
+        return report
         
     except Exception as e:
         return f"Health check error: {str(e)}"
 
-@mcp.tool(name="list_available_tools", description="List all available SQL tools and their descriptions")
+async def invalidate_schema_cache() -> str:
+    """Clear the cached schema information"""
+    if _database is None:
+        return "Error: Database not initialized"
+    
+    logger.debug("Invalidating schema cache")
+    _database.invalidate_schema_cache()
+    return "Schema cache cleared."
+
+# The tool list never changes, so it is built once at import.
+_TOOL_LIST_STR = "\n".join([
+    "🔍 sql_db_query - Execute SQL queries (SELECT, INSERT, UPDATE, etc.)",
+    "🗂️ sql_db_schema_summary - Get a compact summary of every table",
+    "📋 sql_db_schema - Get table schema and structure information", 
+    "📊 sql_db_list_tables - List all available database tables",
+    "✅ sql_db_query_checker - Validate SQL queries for safety and syntax",
+    "ℹ️ sql_db_info - Get database connection and general information",
+    "❤️ health_check - Check server and database health status",
+    "🧹 invalidate_schema_cache - Clear cached table lists and schemas",
+    "📝 list_available_tools - Show this tool list"
+])
+
 async def list_available_tools() -> str:
     """List all available tools with descriptions"""
-    tools_info = [
-        "🔍 sql_db_query - Execute SQL queries (SELECT, INSERT, UPDATE, etc.)",
-        "📋 sql_db_schema - Get table schema and structure information", 
-        "📊 sql_db_list_tables - List all available database tables",
-        "✅ sql_db_query_checker - Validate SQL queries for safety and syntax",
-        "ℹ️ sql_db_info - Get database connection and general information",
-        "❤️ health_check - Check server and database health status",
-        "📝 list_available_tools - Show this tool list"
-    ]
-    return "\n".join(tools_info)
+    return _TOOL_LIST_STR
+
+# --- Tool Registration ---
+# All tools are declared in one table and registered with FastMCP in a single
+# pass: tool name -> (coroutine, description).
+_TOOLS = {
+    "sql_db_query": (
+        sql_db_query,
+        "Execute a SQL query against the database and return results. Use this to run SELECT, INSERT, UPDATE, or other SQL commands.",
+    ),
+    "sql_db_schema_summary": (
+        sql_db_schema_summary,
+        "Get a compact summary of every table: its name, number of columns and approximate row count. Use this first to find relevant tables, then call sql_db_schema for their full schema.",
+    ),
+    "sql_db_schema": (
+        sql_db_schema,
+        "Get the full schema and sample rows for specific tables. Table names are required, separated by commas; use sql_db_schema_summary to find them.",
+    ),
+    "sql_db_list_tables": (
+        sql_db_list_tables,
+        "List all available tables in the database",
+    ),
+    "sql_db_query_checker": (
+        sql_db_query_checker,
+        "Check if a SQL query is safe and valid before execution",
+    ),
+    "sql_db_info": (
+        sql_db_info,
+        "Get general information about the database connection and capabilities",
+    ),
+    "health_check": (
+        health_check,
+        "Check if the MCP server and database connection are working correctly",
+    ),
+    "invalidate_schema_cache": (
+        invalidate_schema_cache,
+        "Clear cached table lists and schemas. Use this after creating, altering or dropping tables.",
+    ),
+    "list_available_tools": (
+        list_available_tools,
+        "List all available SQL tools and their descriptions",
+    ),
+}
+
+for _name, (_fn, _description) in _TOOLS.items():
+    mcp.add_tool(Tool.from_function(_fn, name=_name, description=_description))
 
 def main():
     """Main function to initialize and run the MCP server"""
+    level_name = os.getenv("LOG_LEVEL", "INFO").upper()
+    level = logging.getLevelName(level_name)
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=level if isinstance(level, int) else logging.INFO,
+        format="MCP Server [%(levelname)s]: %(message)s",
+    )
+    if not isinstance(level, int):
+        logger.warning("Unknown LOG_LEVEL '%s', using INFO", level_name)
+    
     if len(sys.argv) < 2:
-        print("FATAL: Database URI not provided as a command-line argument.", file=sys.stderr)
-        print("Usage: python sql_mcp_server.py <database_uri>", file=sys.stderr)
+        logger.critical("Database URI not provided as a command-line argument.")
+        logger.critical("Usage: python sql_mcp_server.py <database_uri>")
         sys.exit(1)
         
     database_url = sys.argv[-1]
-    print(f"MCP Server: Using database URI: {database_url[:50]}...", flush=True)
+    logger.info("Using database URI: %s...", database_url[:50])
     
     try:
         # Initialize database connection
         initialize_database(database_url)
-        print("MCP Server: SQL tools initialized successfully", flush=True)
+        logger.info("SQL tools initialized successfully")
         
     except Exception as e:
-        import traceback
-        print(f"FATAL: Failed to initialize database connection. Error: {e}", file=sys.stderr)
-        traceback.print_exc(file=sys.stderr)
+        logger.critical("Failed to initialize database connection. Error: %s", e, exc_info=True)
         sys.exit(1)
 
     # Print startup confirmation
-    print("MCP Server: All tools registered and ready", flush=True)
-    print("MCP Server: Starting stdio transport...", flush=True)
+    logger.info("All tools registered and ready")
+    logger.info("Starting stdio transport...")
+    
+    # Use uvloop's faster event loop where available (it does not support
+    # Windows). It is handed to the anyio runner that mcp.run would use,
+    # since uvloop.install() is deprecated from Python 3.12.
+    backend_options = {}
+    if sys.platform != "win32":
+        try:
+            import uvloop  # noqa: F401
+            backend_options["use_uvloop"] = True
+            logger.info("Using uvloop event loop")
+        except ImportError:
+            pass
     
     try:
         # Run the server with stdio transport
-        mcp.run(transport="stdio")
+        anyio.run(partial(mcp.run_async, transport="stdio"), backend_options=backend_options)
     except KeyboardInterrupt:
-        print("\nMCP Server: Shutting down gracefully...", flush=True)
+        logger.info("Shutting down gracefully...")
     except Exception as e:
-        print(f"MCP Server: Runtime error: {e}", file=sys.stderr)
+        logger.critical("Runtime error: %s", e)
         sys.exit(1)
 
 # Main execution block